@@ -1,28 +1,21 @@
 import streamlit as st
 import streamlit.components.v1 as components
-import time
 import random
-from datetime import date, datetime, timedelta
-from src.utils import load_players, get_random_player
-from src.auth_streamlit import AuthManager
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date, timedelta
+from src.utils import get_player_index, get_lowered_names, get_name_prefix_index, search_player_indices, get_random_player
+from src.stats import ModeStats
 
 # --- 1. FIREBASE & AUTHENTICATION CONFIG ---
 def init_db():
-    """Initialize Firestore connection"""
+    """Attach the shared Firestore connection to this session"""
     if "db" not in st.session_state:
         try:
-            from google.cloud import firestore
-            from google.oauth2 import service_account
-            import json
-
             if "firebase" in st.secrets:
-                raw_key = st.secrets["firebase"]["textkey"]
-                raw_key = raw_key.strip()
-                
-                key_dict = json.loads(raw_key)
-                creds = service_account.Credentials.from_service_account_info(key_dict)
-                st.session_state.db = firestore.Client(credentials=creds)
-                st.session_state.auth_manager = AuthManager(st.session_state.db)
+                # Only pull in the Firestore libraries when they are configured
+                from src.firestore_client import get_db
+                st.session_state.db, st.session_state.auth_manager = get_db()
             else:
                 print("Error: [firebase] section not found in secrets!")
                 st.session_state.db = None
@@ -32,75 +25,108 @@ def init_db():
             st.session_state.db = None
             st.session_state.auth_manager = None
 
+def _extract_stats(user_data):
+    """Build session stats from an already-fetched user document"""
+    return {mode: ModeStats.from_firestore(user_data.get(mode)) for mode in ['daily', 'random']}
+
 def load_user_stats(user_id):
     """Load stats for authenticated user"""
     if st.session_state.db and st.session_state.auth_manager:
-        user_data = st.session_state.auth_manager.get_user_by_id(user_id)
+        # Only the stats fields, not the password hash and audit fields
+        user_data = st.session_state.auth_manager.get_user_by_id(user_id, field_paths=['daily', 'random'])
         if user_data:
-            # Extract just the stats portion
-            stats = {
-                'daily': user_data.get('daily', {
-                    "played": 0, "won": 0, "current_streak": 0, "max_streak": 0,
-                    "distribution": {str(i): 0 for i in range(1, 7)},
-                    "last_played_date": None
-                }),
-                'random': user_data.get('random', {
-                    "played": 0, "won": 0, "current_streak": 0,
-                    "distribution": {str(i): 0 for i in range(1, 7)}
-                })
-            }
-            # Convert distribution keys to int
-            for mode in ['daily', 'random']:
-                stats[mode]['distribution'] = {int(k): v for k, v in stats[mode]['distribution'].items()}
-            return stats
+            return _extract_stats(user_data)
     
     # Default stats if DB unavailable
-    return {
-        "daily": {
-            "played": 0, "won": 0, "current_streak": 0, "max_streak": 0,
-            "distribution": {i: 0 for i in range(1, 7)},
-            "last_played_date": None
-        },
-        "random": {
-            "played": 0, "won": 0, "current_streak": 0,
-            "distribution": {i: 0 for i in range(1, 7)}
-        }
-    }
-
-def save_stats():
-    """Save stats for authenticated user"""
+    return {"daily": ModeStats(), "random": ModeStats()}
+
+@st.cache_resource
+def get_write_executor():
+    """Shared background pool for Firestore writes"""
+    return ThreadPoolExecutor(max_workers=4)
+
+@st.cache_resource
+def _get_write_chains():
+    """Lock plus each user's latest pending write, used to keep a user's writes in order"""
+    return threading.Lock(), {}
+
+def _submit_in_order(user_id, fn, *args):
+    """Run fn on the write pool only after this user's previous write has finished.
+
+    Each save is a full snapshot, so an older write must never land after a newer
+    one. Chaining per user keeps that order without making users wait on each other.
+    """
+    lock, tails = _get_write_chains()
+    done = Future()
+    
+    def finish(inner):
+        try:
+            done.set_result(inner.result())
+        except Exception as e:
+            done.set_exception(e)
+        with lock:
+            if tails.get(user_id) is done:
+                del tails[user_id]
+    
+    def start(_=None):
+        get_write_executor().submit(fn, *args).add_done_callback(finish)
+    
+    with lock:
+        prev = tails.get(user_id)
+        tails[user_id] = done
+    # Runs immediately if there is no earlier write or it has already finished
+    if prev is None:
+        start()
+    else:
+        prev.add_done_callback(start)
+    return done
+
+def _log_write_result(future):
+    """Log background stats writes that raised (update_user_stats_bulk logs its own failures)"""
+    try:
+        future.result()
+    except Exception as e:
+        print(f"Background stats write failed: {e}")
+
+def save_stats(modes=('daily', 'random')):
+    """Save stats for authenticated user without blocking the rerun"""
     if st.session_state.db and st.session_state.auth_manager and 'user_id' in st.session_state:
-        for mode in ['daily', 'random']:
-            mode_data = st.session_state.stats[mode].copy()
-            # Convert int keys to strings for Firestore
-            mode_data['distribution'] = {str(k): v for k, v in mode_data['distribution'].items()}
-            st.session_state.auth_manager.update_user_stats(
-                st.session_state.user_id,
-                mode,
-                mode_data
-            )
+        # Fresh dicts so the next rerun can't mutate the payload mid-write
+        payload = {mode: st.session_state.stats[mode].to_firestore() for mode in modes}
+        # Write all modes in one round trip, off the script thread
+        future = _submit_in_order(
+            st.session_state.user_id,
+            st.session_state.auth_manager.update_user_stats_bulk,
+            st.session_state.user_id,
+            payload
+        )
+        future.add_done_callback(_log_write_result)
 
 def check_and_fix_streak():
     """Reset streak if user missed playing yesterday"""
-    last_played = st.session_state.stats["daily"]["last_played_date"]
+    last_played = st.session_state.stats["daily"].last_played_date
     
-    if last_played:
+    # Nothing to reset (and nothing to write) if there is no streak
+    if last_played and st.session_state.stats["daily"].current_streak > 0:
         try:
-            last_date = datetime.strptime(last_played, "%Y-%m-%d").date()
+            last_date = date.fromisoformat(last_played)
             today = date.today()
             yesterday = today - timedelta(days=1)
             
             # If last played was NOT yesterday and NOT today, reset streak to 0
             if last_date != yesterday and last_date != today:
-                if st.session_state.stats["daily"]["current_streak"] > 0:
-                    st.session_state.stats["daily"]["current_streak"] = 0
-                    # Save the fixed streak to database
-                    save_stats()
+                # Update locally first; the write happens in the background
+                st.session_state.stats["daily"].current_streak = 0
+                save_stats(modes=('daily',))
         except Exception as e:
             print(f"Error checking streak: {e}")
 
 def save_session_to_localstorage(user_id):
     """Save session to localStorage for cross-tab persistence"""
+    # Only mount the script iframe when the stored ID actually changes
+    if st.session_state.get('_localstorage_synced') == user_id:
+        return
+    st.session_state._localstorage_synced = user_id
     components.html(f"""
         <script>
             localStorage.setItem('footyfeud_uid', '{user_id}');
@@ -160,14 +186,13 @@ def show_login_page():
                         st.session_state.authenticated = True
                         st.session_state.user_id = user_data['user_id']
                         st.session_state.username = user_data['username']
-                        st.session_state.stats = load_user_stats(user_data['user_id'])
+                        st.session_state.stats = _extract_stats(user_data)
                         
-                        # Save session in URL AND localStorage
+                        # Save session in URL (localStorage is synced after the rerun)
                         st.query_params["uid"] = user_data['user_id']
-                        save_session_to_localstorage(user_data['user_id'])
                         
-                        st.success(message)
-                        time.sleep(0.5)
+                        # Shown on the next page instead of pausing here
+                        st.session_state.flash_message = message
                         st.rerun()
                     else:
                         st.error(message)
@@ -188,22 +213,22 @@ def show_login_page():
                 elif new_password != confirm_password:
                     st.error("Passwords do not match")
                 else:
-                    success, message, user_id = st.session_state.auth_manager.create_user(
+                    success, message, user_data = st.session_state.auth_manager.create_user(
                         new_username, new_password
                     )
                     
                     if success:
+                        user_id = user_data['user_id']
                         st.session_state.authenticated = True
                         st.session_state.user_id = user_id
                         st.session_state.username = new_username
-                        st.session_state.stats = load_user_stats(user_id)
+                        st.session_state.stats = _extract_stats(user_data)
                         
-                        # Save session in URL AND localStorage
+                        # Save session in URL (localStorage is synced after the rerun)
                         st.query_params["uid"] = user_id
-                        save_session_to_localstorage(user_id)
                         
-                        st.success(message)
-                        time.sleep(0.5)
+                        # Shown on the next page instead of pausing here
+                        st.session_state.flash_message = message
                         st.rerun()
                     else:
                         st.error(message)
@@ -226,17 +251,20 @@ if not st.session_state.authenticated:
             # Update URL with the UID from localStorage
             st.query_params["uid"] = saved_user_id
     
-    if saved_user_id and st.session_state.db and st.session_state.auth_manager:
+    # Only look up each saved ID once per session so reruns on the login page don't re-read Firestore
+    if (saved_user_id and saved_user_id != st.session_state.get('auto_login_checked_uid')
+            and st.session_state.db and st.session_state.auth_manager):
+        st.session_state.auto_login_checked_uid = saved_user_id
         # Validate saved user ID
-        user_data = st.session_state.auth_manager.get_user_by_id(saved_user_id)
+        user_data = st.session_state.auth_manager.get_user_by_id(
+            saved_user_id, field_paths=['user_id', 'username', 'daily', 'random']
+        )
         if user_data:
             # Auto-login successful!
             st.session_state.authenticated = True
             st.session_state.user_id = user_data['user_id']
             st.session_state.username = user_data['username']
-            st.session_state.stats = load_user_stats(user_data['user_id'])
-            # Make sure session is saved
-            save_session_to_localstorage(user_data['user_id'])
+            st.session_state.stats = _extract_stats(user_data)
 
 # If not authenticated and DB is available, show login
 if not st.session_state.authenticated:
@@ -247,6 +275,9 @@ if not st.session_state.authenticated:
         st.error("Database connection failed. Please contact support.")
         st.stop()
 
+# Make sure session is saved in localStorage (no-op once synced)
+save_session_to_localstorage(st.session_state.user_id)
+
 # Load user stats if not loaded
 if 'stats' not in st.session_state:
     st.session_state.stats = load_user_stats(st.session_state.user_id)
@@ -263,16 +294,23 @@ if 'has_seen_help' not in st.session_state:
 if 'game_mode' not in st.session_state:
     st.session_state.game_mode = None
 
+# Today's date, computed once per rerun
+today_str = date.today().isoformat()
+
 if st.session_state.game_mode and 'secret_player' not in st.session_state:
-    players = load_players()
+    # One cached copy per session; the name -> player dict shares its dicts with the list
+    players, players_by_name = get_player_index()
     st.session_state.all_players = players
+    st.session_state.players_by_name = players_by_name
+    st.session_state.lower_names = get_lowered_names()
+    st.session_state.name_prefix_index = get_name_prefix_index()
     
     if st.session_state.game_mode == "Daily":
-        random.seed(date.today().toordinal())
-        st.session_state.secret_player = get_random_player(players)
-        random.seed() 
+        # Seeded local generator: same player for everyone today, global random state untouched
+        daily_rng = random.Random(date.today().toordinal())
+        st.session_state.secret_player = get_random_player(players, rng=daily_rng)
         # Check if already played today
-        if st.session_state.stats["daily"]["last_played_date"] == str(date.today()):
+        if st.session_state.stats["daily"].last_played_date == today_str:
             st.session_state.game_over = True
             st.session_state.guesses = [] 
         else:
@@ -285,6 +323,39 @@ if st.session_state.game_mode and 'secret_player' not in st.session_state:
 
 # --- 4. HELPER FUNCTIONS ---
 
+APP_CSS = """
+@keyframes slideIn {
+    from { opacity: 0; transform: translateX(-20px); }
+    to { opacity: 1; transform: translateX(0); }
+}
+.player-reveal { display: flex; justify-content: center; margin-bottom: 25px; }
+.player-reveal-circle {
+    width: 160px; height: 160px; border-radius: 50%; overflow: hidden; background-color: #222;
+    border: 3px solid rgba(255,255,255,0.1); display: flex; justify-content: center; align-items: center;
+}
+.player-reveal-circle img { width: 80%; height: 80%; object-fit: contain; filter: brightness(0); opacity: 0.6; }
+.player-reveal.won .player-reveal-circle { background-color: #28a745; }
+.player-reveal.won .player-reveal-circle img { filter: brightness(1) grayscale(0%); opacity: 1; }
+.guess-row { display: grid; grid-template-columns: repeat(5, 1fr); gap: 8px; margin-bottom: 10px; }
+.attr-box {
+    padding: 10px; border-radius: 8px; text-align: center; color: white;
+    border: 1px solid rgba(255,255,255,0.1); min-height: 105px; display: flex;
+    flex-direction: column; justify-content: center; animation: slideIn 0.4s ease-out both;
+}
+.attr-box small { opacity: 0.8; font-size: 0.75em; margin-bottom: 5px; display: block; }
+.attr-box.hide-label small { opacity: 0; }
+.attr-box strong { font-size: 0.9em; display: block; line-height: 1.2; }
+.attr-green { background-color: #28a745; }
+.attr-yellow { background-color: #ffc107; }
+.attr-red { background-color: #dc3545; }
+.dist-chart { display: flex; gap: 1rem; }
+.dist-col { flex: 1; display: flex; flex-direction: column; align-items: center; height: 130px; justify-content: flex-end; }
+.dist-count { font-size: 0.8em; margin-bottom: 5px; font-weight: bold; }
+.dist-bar { background-color: #555; width: 25px; border-radius: 4px 4px 0 0; }
+.dist-bar.current { background-color: #28a745; }
+.dist-label { border-top: 1px solid #888; width: 100%; text-align: center; padding-top: 5px; font-weight: bold; }
+"""
+
 def show_stats_dashboard():
     st.markdown("---")
     mode_key = st.session_state.game_mode.lower()
@@ -293,73 +364,87 @@ def show_stats_dashboard():
     st.subheader(f"📊 {st.session_state.game_mode} Summary")
     
     cols = st.columns(4)
-    win_rate = int((s["won"] / s["played"] * 100)) if s["played"] > 0 else 0
-    cols[0].metric("Played", s["played"])
+    win_rate = int((s.won / s.played * 100)) if s.played > 0 else 0
+    cols[0].metric("Played", s.played)
     cols[1].metric("Win %", f"{win_rate}%")
-    cols[2].metric("Streak", s["current_streak"])
+    cols[2].metric("Streak", s.current_streak)
     if mode_key == "daily":
-        cols[3].metric("Best Streak", s["max_streak"])
+        cols[3].metric("Best Streak", s.max_streak)
 
     st.write("**Guess Distribution**")
-    dist = s["distribution"]
-    max_val = max(dist.values()) if max(dist.values()) > 0 else 1
-    chart_cols = st.columns(6)
+    dist = s.distribution
+    max_val = max(dist, default=0) or 1
     
+    bars = []
     for i in range(1, 7):
-        count = dist[i]
+        count = dist[i - 1]
         bar_height = int((count / max_val) * 100) if count > 0 else 0
         is_current = (st.session_state.game_over and len(st.session_state.guesses) == i and 
                       st.session_state.guesses[-1]['name'] == st.session_state.secret_player['name'])
-        color = "#28a745" if is_current else "#555"
+        current_class = " current" if is_current else ""
         
-        with chart_cols[i-1]:
-            st.markdown(f"""
-                <div style="display: flex; flex-direction: column; align-items: center; height: 130px; justify-content: flex-end;">
-                    <div style="font-size: 0.8em; margin-bottom: 5px; font-weight: bold;">{count}</div>
-                    <div style="background-color: {color}; width: 25px; height: {max(bar_height, 5)}%; border-radius: 4px 4px 0 0;"></div>
-                    <div style="border-top: 1px solid #888; width: 100%; text-align: center; padding-top: 5px; font-weight: bold;">{i}</div>
-                </div>
-            """, unsafe_allow_html=True)
+        bars.append(f"""<div class="dist-col">
+                <div class="dist-count">{count}</div>
+                <div class="dist-bar{current_class}" style="height: {max(bar_height, 5)}%;"></div>
+                <div class="dist-label">{i}</div>
+            </div>""")
+    
+    # All six bars in one markdown call
+    bars_html = "".join(bars)
+    st.markdown(f"""
+        <div class="dist-chart">
+            {bars_html}
+        </div>
+    """, unsafe_allow_html=True)
     st.write("")
 
 def display_player_reveal(image_url, won):
     placeholder = "https://cdn-icons-png.flaticon.com/512/2102/2102633.png"
     img_src = image_url if image_url and image_url != "" else placeholder
-    filter_style = "filter: brightness(1) grayscale(0%);" if won else "filter: brightness(0); opacity: 0.6;"
-    bg_color = "#28a745" if won else "#222"
+    won_class = " won" if won else ""
 
     st.markdown(f"""
-        <div style="display: flex; justify-content: center; margin-bottom: 25px;">
-            <div style="width: 160px; height: 160px; border-radius: 50%; overflow: hidden; background-color: {bg_color};
-                border: 3px solid rgba(255,255,255,0.1); display: flex; justify-content: center; align-items: center;">
-                <img src="{img_src}" style="width: 80%; height: 80%; object-fit: contain; {filter_style}">
+        <div class="player-reveal{won_class}">
+            <div class="player-reveal-circle">
+                <img src="{img_src}">
             </div>
         </div>
     """, unsafe_allow_html=True)
 
-def attribute_box(label, value, color_code, show_label=True, animation_delay=0):
-    label_opacity = "0.8" if show_label else "0"
-    st.markdown(f"""
-        <style>
-        @keyframes slideIn {{
-            from {{
-                opacity: 0;
-                transform: translateX(-20px);
-            }}
-            to {{
-                opacity: 1;
-                transform: translateX(0);
-            }}
-        }}
-        </style>
-        <div style="background-color: {color_code}; padding: 10px; border-radius: 8px; text-align: center; color: white; 
-            margin-bottom: 10px; border: 1px solid rgba(255,255,255,0.1); min-height: 105px; display: flex; 
-            flex-direction: column; justify-content: center;
-            animation: slideIn 0.4s ease-out {animation_delay}s both;">
-            <small style="opacity: {label_opacity}; font-size: 0.75em; margin-bottom: 5px; display: block;">{label}</small>
-            <strong style="font-size: 0.9em; display: block; line-height: 1.2;">{value}</strong>
+def _box_html(label, value, color, show_label=True, animation_delay=0):
+    """Build the HTML for one attribute tile of a guess row"""
+    hidden_class = "" if show_label else " hide-label"
+    # No blank lines: the tiles are joined into one markdown HTML block
+    return f"""<div class="attr-box attr-{color}{hidden_class}" style="animation-delay: {animation_delay}s;">
+            <small>{label}</small>
+            <strong>{value}</strong>
+        </div>"""
+
+def _compute_feedback(guess, secret):
+    """(label, value, color) for each attribute of a guess compared to the secret player"""
+    age_diff = guess['age'] - secret['age']
+    return (
+        ("Nationality", guess['nationality'], "green" if guess['nationality'] == secret['nationality'] else "red"),
+        ("League", guess['league'], "green" if guess['league'] == secret['league'] else "red"),
+        ("Club", guess['club'], "green" if guess['club'] == secret['club'] else "red"),
+        ("Position", guess['position'], "green" if guess['position'] == secret['position'] else "red"),
+        ("Age", f"{guess['age']} {'↑' if age_diff < 0 else '↓' if age_diff > 0 else ''}", 
+         "green" if age_diff == 0 else "yellow" if abs(age_diff) <= 2 else "red")
+    )
+
+def _guess_row_html(items, latest):
+    """Build one guess row as a single 5-column grid (no Streamlit calls)"""
+    # Only animate the latest guess
+    # Stagger animation: 0s, 0.1s, 0.2s, 0.3s, 0.4s
+    boxes = "".join(
+        _box_html(label, val, color, show_label=latest, animation_delay=j * 0.1 if latest else 0)
+        for j, (label, val, color) in enumerate(items)
+    )
+    return f"""
+        <div class="guess-row">
+            {boxes}
         </div>
-    """, unsafe_allow_html=True)
+    """
 
 @st.dialog("📖 How to Play")
 def help_modal():
@@ -373,81 +458,53 @@ def logout():
     clear_session_from_localstorage()
     # Clear the session from URL
     st.query_params.clear()
-    # Clear all session state
-    for key in list(st.session_state.keys()):
-        del st.session_state[key]
+    # Clear all session state (cached player data and the DB client live outside it)
+    st.session_state.clear()
     st.rerun()
 
 def reset_to_menu():
-    for key in ['secret_player', 'guesses', 'game_over', 'game_mode', 'search_results', 'last_search_term']:
+    for key in ['secret_player', 'guesses', 'game_over', 'game_mode', 'search_results', 'last_search_term', 'search_match_count', 'needs_resample']:
         if key in st.session_state: del st.session_state[key]
     st.rerun()
 
+def random_players(count=10):
+    """Pick random players by sampling indices instead of the player list itself"""
+    players = st.session_state.all_players
+    return [players[i] for i in random.sample(range(len(players)), min(count, len(players)))]
+
 def play_another_random():
-    for key in ['secret_player', 'guesses', 'game_over', 'search_results', 'last_search_term']:
+    """Button callback: start a new random round (runs before the fragment reruns, so no st.rerun)"""
+    for key in ['search_results', 'last_search_term', 'search_match_count', 'needs_resample']:
         if key in st.session_state: del st.session_state[key]
     st.session_state.secret_player = get_random_player(st.session_state.all_players)
     st.session_state.guesses = []
     st.session_state.game_over = False
-    st.rerun()
-
-# --- 5. UI LAYOUT ---
-# Header with username and logout
-col1, col2, col3 = st.columns([0.6, 0.3, 0.1], vertical_alignment="bottom")
-with col1: 
-    st.title("⚽ FootyFeud")
-with col2:
-    if st.session_state.get('authenticated'):
-        st.caption(f"👤 {st.session_state.get('username', '')}")
-with col3: 
-    if st.button("❓"): 
-        help_modal()
 
-# Logout button in sidebar
-with st.sidebar:
-    st.markdown("### Account")
-    st.write(f"**{st.session_state.get('username', '')}**")
-    if st.button("🚪 Logout", use_container_width=True):
-        logout()
-
-if not st.session_state.has_seen_help:
-    st.subheader("Welcome to FootyFeud! 🏆")
-    if st.button("Let's Play!", use_container_width=True):
-        st.session_state.has_seen_help = True
-        st.rerun()
-
-elif st.session_state.game_mode is None:
-    st.subheader("Choose your challenge:")
-    m_col1, m_col2 = st.columns(2)
-    with m_col1:
-        if st.button("📅 Daily Challenge", use_container_width=True):
-            st.session_state.game_mode = "Daily"
-            st.rerun()
-    with m_col2:
-        if st.button("🎲 Random Mode", use_container_width=True):
-            st.session_state.game_mode = "Random"
-            st.rerun()
-
-else:
-    # --- GAMEPLAY ---
+# --- GAMEPLAY ---
+@st.fragment
+def gameplay():
+    """Game screen; its widgets only rerun this fragment, not the whole page"""
+    # Fragment reruns skip the module-level code, so refresh the date here
+    today_str = date.today().isoformat()
     st.caption(f"Mode: {st.session_state.game_mode} | Guess: {len(st.session_state.guesses)}/6")
     
     is_win = len(st.session_state.guesses) > 0 and st.session_state.guesses[-1]['name'] == st.session_state.secret_player['name']
     display_player_reveal(st.session_state.secret_player['img_url'], is_win)
 
     # LOCK CHECK FOR DAILY
-    if st.session_state.game_mode == "Daily" and st.session_state.stats["daily"]["last_played_date"] == str(date.today()):
+    if st.session_state.game_mode == "Daily" and st.session_state.stats["daily"].last_played_date == today_str:
         st.info("Daily Challenge completed! See you tomorrow.")
         show_stats_dashboard()
         if st.button("🏠 Menu", use_container_width=True): reset_to_menu()
     else:
         # SINGLE AUTOCOMPLETE SEARCH with randomized 10 results
         # Initialize search results
-        if 'search_results' not in st.session_state:
+        # Resample only at game start or after a guess, not on every rerun
+        if 'search_results' not in st.session_state or st.session_state.get('needs_resample'):
             # Start with 10 random players
-            st.session_state.search_results = random.sample(st.session_state.all_players, 
-                                                           min(10, len(st.session_state.all_players)))
+            st.session_state.search_results = random_players()
             st.session_state.last_search_term = ""
+            st.session_state.needs_resample = False
         
         # Single selectbox with type-to-search functionality
         def update_search_results():
@@ -457,40 +514,43 @@ else:
             # Check if this is a search term (user typing) or a selection
             if selected and selected not in ["🔍 Type to search...", "No results found"]:
                 # User selected a player
-                guessed_player = next((p for p in st.session_state.all_players if p["name"] == selected), None)
+                guessed_player = st.session_state.players_by_name.get(selected)
                 
                 if guessed_player and not st.session_state.game_over:
                     if guessed_player['name'] not in [g['name'] for g in st.session_state.guesses]:
-                        guessed_player['is_new'] = True
+                        # Copy so the flag doesn't leak into the shared player list
+                        guessed_player = {**guessed_player, 'is_new': True}
+                        # Feedback never changes once guessed, so compute it once here
+                        guessed_player['_feedback'] = _compute_feedback(guessed_player, st.session_state.secret_player)
                         st.session_state.guesses.append(guessed_player)
                         
                         mode = st.session_state.game_mode.lower()
+                        # Callbacks run before the next rerun, so don't rely on the module-level date
+                        played_date = date.today().isoformat()
                         
                         # WIN
                         if guessed_player['name'] == st.session_state.secret_player['name']:
                             st.session_state.game_over = True
-                            st.session_state.stats[mode]["played"] += 1
-                            st.session_state.stats[mode]["won"] += 1
-                            st.session_state.stats[mode]["current_streak"] += 1
-                            st.session_state.stats[mode]["distribution"][len(st.session_state.guesses)] += 1
+                            st.session_state.stats[mode].played += 1
+                            st.session_state.stats[mode].won += 1
+                            st.session_state.stats[mode].current_streak += 1
+                            st.session_state.stats[mode].distribution[len(st.session_state.guesses) - 1] += 1
                             if mode == "daily":
-                                st.session_state.stats[mode]["last_played_date"] = str(date.today())
-                                if st.session_state.stats[mode]["current_streak"] > st.session_state.stats[mode]["max_streak"]:
-                                    st.session_state.stats[mode]["max_streak"] = st.session_state.stats[mode]["current_streak"]
+                                st.session_state.stats[mode].last_played_date = played_date
+                                if st.session_state.stats[mode].current_streak > st.session_state.stats[mode].max_streak:
+                                    st.session_state.stats[mode].max_streak = st.session_state.stats[mode].current_streak
                             save_stats()
                         # LOSS
                         elif len(st.session_state.guesses) >= 6:
                             st.session_state.game_over = True
-                            st.session_state.stats[mode]["played"] += 1
-                            st.session_state.stats[mode]["current_streak"] = 0
+                            st.session_state.stats[mode].played += 1
+                            st.session_state.stats[mode].current_streak = 0
                             if mode == "daily":
-                                st.session_state.stats[mode]["last_played_date"] = str(date.today())
+                                st.session_state.stats[mode].last_played_date = played_date
                             save_stats()
                         
                         # Reset search after guess
-                        st.session_state.search_results = random.sample(st.session_state.all_players, 
-                                                                       min(10, len(st.session_state.all_players)))
-                        st.session_state.last_search_term = ""
+                        st.session_state.needs_resample = True
         
         # Text input for filtering
         search_term = st.text_input(
@@ -504,30 +564,26 @@ else:
         # Update results if search changed
         if search_term != st.session_state.last_search_term:
             if search_term:
-                # Filter and randomize
-                filtered = [p for p in st.session_state.all_players 
-                           if search_term.lower() in p['name'].lower()]
-                if filtered:
-                    random.shuffle(filtered)
-                    st.session_state.search_results = filtered[:10]
-                else:
-                    st.session_state.search_results = []
+                # Prefix search on the precomputed name index and randomize indices
+                filtered_idx = search_player_indices(search_term.lower(), st.session_state.lower_names,
+                                                     st.session_state.name_prefix_index)
+                st.session_state.search_match_count = len(filtered_idx)
+                picked = random.sample(filtered_idx, min(10, len(filtered_idx)))
+                st.session_state.search_results = [st.session_state.all_players[i] for i in picked]
             else:
                 # No search term - show 10 random
-                st.session_state.search_results = random.sample(st.session_state.all_players, 
-                                                               min(10, len(st.session_state.all_players)))
+                st.session_state.search_results = random_players()
+                st.session_state.search_match_count = len(st.session_state.all_players)
             
             st.session_state.last_search_term = search_term
         
         # Show results count
         if st.session_state.search_results:
             result_count = len(st.session_state.search_results)
-            all_filtered = [p for p in st.session_state.all_players 
-                           if search_term.lower() in p['name'].lower()] if search_term else st.session_state.all_players
             
             if search_term:
-                if len(all_filtered) > 10:
-                    st.caption(f"✨ Showing 10 random results from {len(all_filtered)} matches")
+                if st.session_state.search_match_count > 10:
+                    st.caption(f"✨ Showing 10 random results from {st.session_state.search_match_count} matches")
                 else:
                     st.caption(f"✨ {result_count} result{'s' if result_count != 1 else ''} found")
             else:
@@ -539,7 +595,7 @@ else:
             st.caption("❌ No players found")
             player_options = ["No results found"]
         
-        selected_player = st.selectbox(
+        st.selectbox(
             "Choose from results:",
             options=player_options,
             key="player_search_box",
@@ -572,32 +628,65 @@ else:
             with e_col1:
                 if st.button("🏠 Menu", use_container_width=True): reset_to_menu()
             with e_col2:
-                if st.button("🔄 Next Round", use_container_width=True):
-                    if st.session_state.game_mode == "Random": play_another_random()
-                    else: reset_to_menu()
+                if st.session_state.game_mode == "Random":
+                    st.button("🔄 Next Round", use_container_width=True, on_click=play_another_random)
+                elif st.button("🔄 Next Round", use_container_width=True):
+                    reset_to_menu()
 
     # --- GUESS GRID ---
     if st.session_state.guesses:
-        secret = st.session_state.secret_player
         for i, guess in enumerate(reversed(st.session_state.guesses)):
             if i == 0: 
                 st.write("### 🎯 Latest Guess")
             elif i == 1: 
                 st.write("### 📜 History")
             
-            cols = st.columns(5)
-            items = [
-                ("Nationality", guess['nationality'], "#28a745" if guess['nationality'] == secret['nationality'] else "#dc3545"),
-                ("League", guess['league'], "#28a745" if guess['league'] == secret['league'] else "#dc3545"),
-                ("Club", guess['club'], "#28a745" if guess['club'] == secret['club'] else "#dc3545"),
-                ("Position", guess['position'], "#28a745" if guess['position'] == secret['position'] else "#dc3545"),
-                ("Age", f"{guess['age']} {'↑' if guess['age'] < secret['age'] else '↓' if guess['age'] > secret['age'] else ''}", 
-                 "#28a745" if guess['age'] == secret['age'] else "#ffc107" if abs(guess['age'] - secret['age']) <= 2 else "#dc3545")
-            ]
-            
-            # Only animate the latest guess (i == 0)
-            for j, (label, val, color) in enumerate(items):
-                # Stagger animation: 0s, 0.1s, 0.2s, 0.3s, 0.4s
-                delay = j * 0.1 if i == 0 else 0
-                with cols[j]: 
-                    attribute_box(label, val, color, show_label=(i == 0), animation_delay=delay)
\ No newline at end of file
+            st.markdown(_guess_row_html(guess['_feedback'], latest=(i == 0)), unsafe_allow_html=True)
+
+# --- 5. UI LAYOUT ---
+# Shared styles for the game screen. Streamlit drops elements that a rerun
+# doesn't re-emit, so this goes out on every full run (fragment reruns keep it)
+st.markdown(f"<style>{APP_CSS}</style>", unsafe_allow_html=True)
+
+# Header with username and logout
+col1, col2, col3 = st.columns([0.6, 0.3, 0.1], vertical_alignment="bottom")
+with col1: 
+    st.title("⚽ FootyFeud")
+with col2:
+    if st.session_state.get('authenticated'):
+        st.caption(f"👤 {st.session_state.get('username', '')}")
+with col3: 
+    if st.button("❓"): 
+        help_modal()
+
+# One-shot message carried over from login/signup
+if 'flash_message' in st.session_state:
+    st.success(st.session_state.pop('flash_message'))
+
+# Logout button in sidebar
+with st.sidebar:
+    st.markdown("### Account")
+    st.write(f"**{st.session_state.get('username', '')}**")
+    if st.button("🚪 Logout", use_container_width=True):
+        logout()
+
+if not st.session_state.has_seen_help:
+    st.subheader("Welcome to FootyFeud! 🏆")
+    if st.button("Let's Play!", use_container_width=True):
+        st.session_state.has_seen_help = True
+        st.rerun()
+
+elif st.session_state.game_mode is None:
+    st.subheader("Choose your challenge:")
+    m_col1, m_col2 = st.columns(2)
+    with m_col1:
+        if st.button("📅 Daily Challenge", use_container_width=True):
+            st.session_state.game_mode = "Daily"
+            st.rerun()
+    with m_col2:
+        if st.button("🎲 Random Mode", use_container_width=True):
+            st.session_state.game_mode = "Random"
+            st.rerun()
+
+else:
+    gameplay()
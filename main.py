@@ -1,8 +1,10 @@
-from src.utils import load_players, get_random_player
+from src.utils import read_players, get_random_player
 from src.logics import find_player_by_name, get_feedback
 
 def play_game():
-    all_players = load_players()
+    # Plain loader: the CLI runs outside Streamlit, so skip its cache
+    all_players = read_players()
+    names = [p["name"] for p in all_players]
     secret_player = get_random_player(all_players)
     
     attempts = 6
@@ -13,7 +15,7 @@ def play_game():
 
     while attempts > 0:
         user_input = input(f"\n({attempts} tries left) Guess player: ")
-        guessed_player = find_player_by_name(user_input, all_players)
+        guessed_player = find_player_by_name(user_input, all_players, names)
 
         if not guessed_player:
             print("❌ Player not in database.")
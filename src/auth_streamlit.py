@@ -1,8 +1,16 @@
 import hashlib
+import hmac
 import secrets
 import re
 from datetime import datetime
-from typing import Optional, Dict, Tuple
+from typing import Optional, Dict, List, Tuple
+from src.stats import ModeStats
+
+# PBKDF2 work factor for new hashes; stored per user so it can be raised later
+PBKDF2_ITERATIONS = 200_000
+
+# Letters, numbers, _ and - only (\Z so a trailing newline doesn't slip through)
+_USERNAME_RE = re.compile(r'^[a-zA-Z0-9_-]+\Z')
 
 class AuthManager:
     """Manages user authentication with Firestore"""
@@ -16,16 +24,16 @@ class AuthManager:
         Validate username format
         """
         if not username:
-            return False, 
+            return False, "Username is required"
         
         if len(username) < 3:
-            return False, 
+            return False, "Username must be at least 3 characters"
         
         if len(username) > 20:
-            return False, 
+            return False, "Username must be at most 20 characters"
         
-        if not re.match(r'^[a-zA-Z0-9_-]+$', username):
-            return False, 
+        if not _USERNAME_RE.match(username):
+            return False, "Username can only contain letters, numbers, _ and -"
         
         return True, ""
     
@@ -35,26 +43,35 @@ class AuthManager:
         Validate password strength
         """
         if not password:
-            return False, 
+            return False, "Password is required"
         
         if len(password) < 6:
-            return False, 
+            return False, "Password must be at least 6 characters"
         
         return True, ""
     
     @staticmethod
-    def hash_password(password: str, salt: Optional[str] = None) -> Tuple[str, str]:
+    def hash_password(password: str, salt: Optional[str] = None,
+                      iterations: int = PBKDF2_ITERATIONS) -> Tuple[str, str]:
         """
-        Hash password with salt using SHA-256
+        Hash password with salt using PBKDF2-HMAC-SHA256
         """
         if salt is None:
             salt = secrets.token_hex(16)
         
-        pwd_salt = f"{password}{salt}".encode('utf-8')
-        hashed = hashlib.sha256(pwd_salt).hexdigest()
+        salt_bytes = bytes.fromhex(salt) if len(salt) == 32 else salt.encode('utf-8')
+        hashed = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt_bytes, iterations).hex()
         
         return hashed, salt
     
+    @staticmethod
+    def legacy_hash_password(password: str, salt: str) -> str:
+        """
+        Single-round SHA-256 hash used by accounts created before PBKDF2
+        """
+        pwd_salt = f"{password}{salt}".encode('utf-8')
+        return hashlib.sha256(pwd_salt).hexdigest()
+    
     def username_exists(self, username: str) -> bool:
         """
         Check if username already exists in database
@@ -63,17 +80,18 @@ class AuthManager:
             username_lower = username.lower()
             users_ref = self.db.collection('users')
             query = users_ref.where('username_lower', '==', username_lower).limit(1)
-            docs = query.stream()
+            # get() collects the same RunQuery stream into a list; used here for readability
+            docs = query.get()
             
-            return len(list(docs)) > 0
+            return len(docs) > 0
             
         except Exception as e:
             print(f"Error checking username: {e}")
             return False
     
-    def create_user(self, username: str, password: str) -> Tuple[bool, str, Optional[str]]:
+    def create_user(self, username: str, password: str) -> Tuple[bool, str, Optional[Dict]]:
         """
-        Create a new user account
+        Create a new user account and return the stored user record
         """
         # Validate username
         is_valid, error = self.validate_username(username)
@@ -102,28 +120,17 @@ class AuthManager:
             'username_lower': username.lower(),
             'password_hash': hashed_pwd,
             'salt': salt,
+            'hash_iterations': PBKDF2_ITERATIONS,
             'created_at': datetime.now().isoformat(),
             'last_login': datetime.now().isoformat(),
-            'daily': {
-                'played': 0,
-                'won': 0,
-                'current_streak': 0,
-                'max_streak': 0,
-                'distribution': {str(i): 0 for i in range(1, 7)},
-                'last_played_date': None
-            },
-            'random': {
-                'played': 0,
-                'won': 0,
-                'current_streak': 0,
-                'distribution': {str(i): 0 for i in range(1, 7)}
-            }
+            'daily': ModeStats().to_firestore(),
+            'random': ModeStats().to_firestore()
         }
         
         try:
             # Save to Firestore
             self.db.collection('users').document(user_id).set(user_data)
-            return True, "Account created successfully!", user_id
+            return True, "Account created successfully!", user_data
         except Exception as e:
             print(f"Error creating user: {e}")
             return False, "Failed to create account. Please try again.", None
@@ -136,7 +143,7 @@ class AuthManager:
             username_lower = username.lower()
             users_ref = self.db.collection('users')
             query = users_ref.where('username_lower', '==', username_lower).limit(1)
-            docs = list(query.stream())
+            docs = query.get()
             
             if not docs:
                 return False, "Invalid username or password", None
@@ -148,16 +155,32 @@ class AuthManager:
             # Verify password
             salt = user_data.get('salt')
             stored_hash = user_data.get('password_hash')
+            iterations = user_data.get('hash_iterations')
             
-            hashed_pwd, _ = self.hash_password(password, salt)
+            if iterations:
+                hashed_pwd, _ = self.hash_password(password, salt, iterations)
+            else:
+                hashed_pwd = self.legacy_hash_password(password, salt)
             
-            if hashed_pwd != stored_hash:
+            # Constant-time comparison so timing doesn't leak how much of the hash matched
+            if not stored_hash or not hmac.compare_digest(hashed_pwd, stored_hash):
                 return False, "Invalid username or password", None
             
             # Update last login
-            user_doc.reference.update({
+            updates = {
                 'last_login': datetime.now().isoformat()
-            })
+            }
+            
+            # Re-hash legacy or outdated hashes now that we have the password
+            if iterations != PBKDF2_ITERATIONS:
+                new_hash, new_salt = self.hash_password(password)
+                updates.update({
+                    'password_hash': new_hash,
+                    'salt': new_salt,
+                    'hash_iterations': PBKDF2_ITERATIONS
+                })
+            
+            user_doc.reference.update(updates)
             
             return True, "Login successful!", user_data
             
@@ -165,12 +188,12 @@ class AuthManager:
             print(f"Error authenticating user: {e}")
             return False, "Authentication failed. Please try again.", None
     
-    def get_user_by_id(self, user_id: str) -> Optional[Dict]:
+    def get_user_by_id(self, user_id: str, field_paths: Optional[List[str]] = None) -> Optional[Dict]:
         """
-        Get user data by user ID
+        Get user data by user ID, optionally fetching only the given fields
         """
         try:
-            doc = self.db.collection('users').document(user_id).get()
+            doc = self.db.collection('users').document(user_id).get(field_paths=field_paths)
             if doc.exists:
                 return doc.to_dict()
             return None
@@ -182,11 +205,20 @@ class AuthManager:
         """
         Update user game statistics for a specific mode
         """
+        return self.update_user_stats_bulk(user_id, {mode: stats_data})
+    
+    def update_user_stats_bulk(self, user_id: str, stats_by_mode: Dict[str, Dict]) -> bool:
+        """
+        Update game statistics for several modes in a single batched write
+        """
         try:
             user_ref = self.db.collection('users').document(user_id)
-            user_ref.update({
-                mode: stats_data
-            })
+            batch = self.db.batch()
+            # update() only touches the stats fields and fails if the account is gone,
+            # rather than recreating a stats-only document for a deleted user
+            batch.update(user_ref, stats_by_mode)
+            # The client's default retry already covers transient Commit errors
+            batch.commit()
             return True
         except Exception as e:
             print(f"Error updating stats: {e}")
@@ -0,0 +1,16 @@
+import json
+import streamlit as st
+from google.cloud import firestore
+from google.oauth2 import service_account
+from src.auth_streamlit import AuthManager
+
+@st.cache_resource(show_spinner=False)
+def get_db():
+    """Create the Firestore client and auth manager once per process"""
+    raw_key = st.secrets["firebase"]["textkey"]
+    raw_key = raw_key.strip()
+    
+    key_dict = json.loads(raw_key)
+    creds = service_account.Credentials.from_service_account_info(key_dict)
+    db = firestore.Client(credentials=creds)
+    return db, AuthManager(db)
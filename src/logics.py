@@ -1,15 +1,18 @@
 from colorama import Fore, Style, init
-from rapidfuzz import process, fuzz
+from rapidfuzz import process, fuzz, utils
 
 # Initialize colorama for Windows/Mac compatibility
 init(autoreset=True)
 
-def find_player_by_name(guess_name, player_list):
-    # Create a list of all full names from your JSON
-    names = [p["name"] for p in player_list]
+def find_player_by_name(guess_name, player_list, names=None):
+    # Reuse the caller's name list if given, otherwise build it from your JSON
+    if names is None:
+        names = [p["name"] for p in player_list]
 
     # Find the best match. 'extractOne' returns (name, score, index)
-    match = process.extractOne(guess_name, names, scorer=fuzz.WRatio)
+    # score_cutoff lets rapidfuzz skip candidates that can't reach 70%
+    match = process.extractOne(guess_name, names, scorer=fuzz.WRatio,
+                               processor=utils.default_process, score_cutoff=70)
 
     # If the score is high enough (e.g., > 70%), return that player
     if match and match[1] > 70:
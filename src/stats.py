@@ -0,0 +1,44 @@
+from dataclasses import dataclass, field
+from typing import Optional, Dict, List
+
+@dataclass(slots=True)
+class ModeStats:
+    """Game statistics for one mode (daily or random)"""
+    played: int = 0
+    won: int = 0
+    current_streak: int = 0
+    max_streak: int = 0
+    # Wins by number of guesses: index 0 is a win on the first guess
+    distribution: List[int] = field(default_factory=lambda: [0] * 6)
+    last_played_date: Optional[str] = None
+
+    @classmethod
+    def from_firestore(cls, data: Optional[Dict]) -> "ModeStats":
+        """
+        Build from the stored form, where distribution is keyed "1".."6"
+        """
+        if not data:
+            return cls()
+
+        dist = data.get('distribution', {})
+        return cls(
+            played=data.get('played', 0),
+            won=data.get('won', 0),
+            current_streak=data.get('current_streak', 0),
+            max_streak=data.get('max_streak', 0),
+            distribution=[dist.get(str(i), 0) for i in range(1, 7)],
+            last_played_date=data.get('last_played_date')
+        )
+
+    def to_firestore(self) -> Dict:
+        """
+        Convert to a fresh dict in the stored form
+        """
+        return {
+            'played': self.played,
+            'won': self.won,
+            'current_streak': self.current_streak,
+            'max_streak': self.max_streak,
+            'distribution': {str(i): count for i, count in enumerate(self.distribution, start=1)},
+            'last_played_date': self.last_played_date
+        }
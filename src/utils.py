@@ -1,8 +1,10 @@
 import json
 import random
 import os
+from bisect import bisect_left
+import streamlit as st
 
-def load_players():
+def read_players():
     """Loads the athlete data from the JSON file with UTF-8 support."""
     base_path = os.path.dirname(__file__)
     file_path = os.path.join(base_path, '../data/players.json')
@@ -10,6 +12,47 @@ def load_players():
     with open(file_path, 'r', encoding='utf-8') as f:
         return json.load(f)
 
-def get_random_player(player_list):
+@st.cache_data(ttl=3600, show_spinner=False)
+def load_players():
+    """Cached read_players() for the Streamlit app (parsed once per process)."""
+    return read_players()
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_player_index():
+    """Returns the players and a name -> player dict."""
+    players = load_players()
+    # Reversed so duplicate names resolve to their first occurrence
+    by_name = {p['name']: p for p in reversed(players)}
+    return players, by_name
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_lowered_names():
+    """Lowercased player names, index-aligned with load_players() for searching."""
+    return [p['name'].lower() for p in load_players()]
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_name_prefix_index():
+    """Sorted (name or name word, player index) pairs for prefix search."""
+    index = []
+    for i, name in enumerate(get_lowered_names()):
+        index.append((name, i))
+        # Later words too, so "haal" finds "erling haaland"
+        index.extend((word, i) for word in name.split()[1:])
+    index.sort()
+    return index
+
+def search_player_indices(needle, lowered_names, prefix_index):
+    """Indices of players whose name or a word of it starts with needle, topped up with substring matches."""
+    lo = bisect_left(prefix_index, (needle,))
+    hi = bisect_left(prefix_index, (needle + '\uffff',))
+    # A player can match on several words; keep each once
+    matches = dict.fromkeys(i for _, i in prefix_index[lo:hi])
+    # Too few prefix hits ("ll", "van") would under-report the match count, so add
+    # mid-word matches; a large prefix range already fills the 10 shown results
+    if len(matches) < 10:
+        matches.update(dict.fromkeys(i for i, n in enumerate(lowered_names) if needle in n))
+    return list(matches)
+
+def get_random_player(player_list, rng=None):
     """Selects one random athlete to be the 'Secret Player'."""
-    return random.choice(player_list)
\ No newline at end of file
+    return (rng or random).choice(player_list)
\ No newline at end of file